@@ -1,8 +1,7 @@
-import textwrap
+import importlib.util
 import numpy as np
 from dash import Dash
 import plotly.graph_objs as go
-import random
 import pandas as pd
 from dash import dcc, html
 from dash.dependencies import Input, Output
@@ -10,9 +9,15 @@ from dash.dependencies import Input, Output
 
 
 
-app = Dash(__name__)
+#responses are gzip compressed when the optional flask-compress package is installed.
+#plotly already serializes figures with orjson on its own whenever orjson is installed
+app = Dash(__name__, compress=importlib.util.find_spec('flask_compress') is not None)
 
-df = pd.read_csv('Comprehensive CAPEC Dictionary.csv')
+#only the columns used by the app are parsed, read as strings to skip type inference
+_USE = ['ID', 'Name', 'Description', 'Typical Severity', 'Likelihood Of Attack',
+        'Related Weaknesses', 'Example Instances', 'Mitigations']
+df = pd.read_csv('Comprehensive CAPEC Dictionary.csv', usecols=_USE, dtype='string')
+df['ID'] = df['ID'].astype('int64')
 CAPECids = df['ID']
 
 
@@ -21,21 +26,109 @@ color = { 'Very High':  'red',
           'Medium': 'indigo',
           'Low': 'turquoise',
           'Very Low': 'blue',
-          'None': 'lightblue',
-          np.nan: 'lightblue'}
+          'None': 'lightblue'}
 
 weights = {'High': 35,
            'Medium': 27,
-           'Low': 18,
-           np.nan : 18}
+           'Low': 18}
+
+#severity/likelihood are stored as small integer category codes plus a color/size palette per category.
+#missing values have the code -1, which picks the fallback appended to the end of each palette
+_sev = df['Typical Severity'].astype('category')
+_sev_codes = _sev.cat.codes.to_numpy(np.int8)
+_sev_palette = np.array([color.get(c, 'lightblue') for c in _sev.cat.categories] + ['lightblue'])
+_wt = df['Likelihood Of Attack'].astype('category')
+_wt_codes = _wt.cat.codes.to_numpy(np.int8)
+_wt_palette = np.array([weights.get(c, 18) for c in _wt.cat.categories] + [18])
+
+#columns shown when a CAPEC ID is clicked, pulled out once so they can be indexed by position
+_names = df['Name'].to_numpy()
+_descs = df['Description'].to_numpy()
+
+#the '::' separated columns are parsed once here, empty cells become an empty list/string
+_cwe_lists = df['Related Weaknesses'].fillna('').str.split('::').map(lambda x: x[1:-1]).tolist()
+_instances = df['Example Instances'].fillna('').str.replace('::', '\n', regex=False).to_numpy()
+_mitigations = df['Mitigations'].fillna('').str.replace('::', '\n', regex=False).to_numpy()
+
+#links to the capec.mitre.org page of every CAPEC ID and the cwe.mitre.org pages of its related weaknesses
+_capec_links = ('https://capec.mitre.org/data/definitions/' + CAPECids.astype(str)).to_numpy()
+_cwe_link_lists = [['https://cwe.mitre.org/data/definitions/' + cwe for cwe in cwe_ids] for cwe_ids in _cwe_lists]
+
+#text styles shared by the callback output
+_GREY_TEXT = {'color': 'grey', 'fontSize': 15}
+_RED_TEXT = {'color': 'red', 'fontSize': 15}
+
+#placeholder messages shared by every callback invocation
+_EMPTY_INFO = html.P('Click on a CAPEC ID to see a description of the attack pattern', style=_GREY_TEXT)
+_EMPTY_TABLE = html.P('If a CAPEC ID is clicked, information will be displayed here.', style=_GREY_TEXT)
+_NO_WEAKNESS = html.P('No weakness data available', style=_RED_TEXT)
+_NO_INSTANCE = html.P('No example instance data available', style=_RED_TEXT)
+_NO_MITIGATION = html.P('No mitigation available', style=_RED_TEXT)
+
+
+def _build_weakness_div(cwe_links):
+    """
+    Builds the related weaknesses shown by update_table for one CAPEC ID: a link to each of its CWE IDs.
+    """
+    if not cwe_links:
+        return _NO_WEAKNESS
+    list_of_cwe=[]
+    text = 'Below you will find a link of realted weaknesses from the Common Weakness Enumeration (CWE) catolog'
+    for link in cwe_links:
+        list_of_cwe.append(html.P(html.A(link, href=link, target='_blank'), style=_GREY_TEXT))
+
+    return html.Div([
+        html.P(text, style=_GREY_TEXT),
+        html.P(list_of_cwe)
+        ])
+
+
+def _build_text_p(text, missing):
+    """
+    Builds the example instances or mitigations shown by update_table for one CAPEC ID, or the missing message if text is empty.
+    """
+    if not text:
+        return missing
+    return html.P(text, style=_GREY_TEXT)
 
-severity_color = [color[val] for val in df['Typical Severity']]
-weight_size = [weights[val] for val in df['Likelihood Of Attack']]
+
+def _build_point_info(name, description, link):
+    """
+    Builds the name, description and link shown by on_click for one CAPEC ID.
+    """
+    text = 'To learn more follow this link: '
+
+    return html.Div([
+        html.H3(children=name, style={'color': 'darkgrey', 'fontSize': 25}),
+        html.P(children=description, style={**_GREY_TEXT, 'whiteSpace': 'normal', 'maxWidth': 700}),
+        html.P(children=[text, html.A(link, href=link, target='_blank')], style={'color': 'grey', 'fontSize': 12}),
+    ])
+
+
+#the point info for every CAPEC ID is built once here, so on_click only has to look it up
+_POINT_INFO = [_build_point_info(name, description, link) for name, description, link in zip(_names, _descs, _capec_links)]
+
+#the table for every CAPEC ID and radio item is built once here, so update_table only has to look it up
+_TABLE_COMPONENTS = {
+    'weakness': [_build_weakness_div(cwe_links) for cwe_links in _cwe_link_lists],
+    'instance': [_build_text_p(text, _NO_INSTANCE) for text in _instances],
+    'mitigation': [_build_text_p(text, _NO_MITIGATION) for text in _mitigations],
+}
+
+#layout shared by every word cloud figure
+_LAYOUT = go.Layout({'xaxis': {'showgrid': False, 'showticklabels': False, 'zeroline': False},
+                     'yaxis': {'showgrid': False, 'showticklabels': False, 'zeroline': False}},
+                    width=760,
+                    height=760)
+
+#random number generator used to place the CAPEC IDs on the word cloud
+_rng = np.random.default_rng()
 
 
 @app.callback(
     Output('point-info', 'children'),
-    Input('word-cloud', 'clickData')
+    Input('word-cloud', 'clickData'),
+    prevent_initial_call=True
 )
 
 def on_click(clickData):
@@ -53,26 +146,15 @@ def on_click(clickData):
         """
 
     if clickData is None:
-        return html.P('Click on a CAPEC ID to see a description of the attack pattern', style={'color': 'grey', 'fontSize': 15}),
-    point_index = clickData['points'][0]['pointIndex']
-    name = df.loc[point_index, 'Name']
-    description = df.loc[point_index, 'Description']
-    id = CAPECids[point_index]
-    wraptext = '\n'.join(textwrap.wrap(description, width=100))
-    text = f'To learn more follow this link: '
-    link = f'https://capec.mitre.org/data/definitions/{id}'
-
-    return html.Div([
-        html.H3(children=name, style={'color': 'darkgrey', 'fontSize': 25}),
-        html.P(children=wraptext, style={'color': 'grey', 'fontSize': 15}),
-        html.P(children=[text, html.A(link, href=link, target='_blank')], style={'color': 'grey', 'fontSize': 12}),
-    ])
+        return _EMPTY_INFO
+    return _POINT_INFO[clickData['points'][0]['pointIndex']]
 
 
 @app.callback(
     Output('table', 'children'),
     Input('radio-items', 'value'),
-    Input('word-cloud', 'clickData')
+    Input('word-cloud', 'clickData'),
+    prevent_initial_call=True
 )
 def update_table(value, clickData):
     """
@@ -90,44 +172,46 @@ def update_table(value, clickData):
         """
 
     if clickData is None:
-        return html.P('If a CAPEC ID is clicked, information will be displayed here.', style={'color': 'grey', 'fontSize': 15})
-
-    point_index = clickData['points'][0]['pointIndex']
-
-    if value == 'weakness':
-        weakness = df.loc[point_index, 'Related Weaknesses']
-        if pd.isna(weakness):
-            return html.P('No weakness data available', style={'color': 'red', 'fontSize': 15})
-        cwe_ids = weakness.split("::")[1:-1]
-        list_of_cwe=[]
-        text = 'Below you will find a link of realted weaknesses from the Common Weakness Enumeration (CWE) catolog'
-        for cwe in cwe_ids:
-            link = f'https://cwe.mitre.org/data/definitions/{cwe}'
-            list_of_cwe.append(html.P(html.A(link, href=link, target='_blank'), style={'color':'grey','fontSize':15}))
-
-        return html.Div([
-            html.P(text,style = {'color': 'grey', 'fontSize': 15}),
-            html.P(list_of_cwe)
-            ])
-
-    elif value == 'instance':
-        instance = df.loc[point_index, 'Example Instances']
-        if pd.isna(instance):
-            return html.P('No example instance data available', style={'color': 'red', 'fontSize': 15})
-        text = instance.replace('::', '\n')
-        return html.P(text, style={'color': 'grey', 'fontSize': 15})
-
-    elif value == 'mitigation':
-        mitigation = df.loc[point_index, 'Mitigations']
-        if pd.isna(mitigation):
-            return 'No mitigation available'
-        text = mitigation.replace('::', '\n')
-        return html.P(text,style={'color': 'grey', 'fontSize': 15})
+        return _EMPTY_TABLE
+    return _TABLE_COMPONENTS[value][clickData['points'][0]['pointIndex']]
+
+
+def _build_fig(cids):
+    """
+    This function builds the word cloud figure for a given number of CAPEC IDs. It is called once per dropdown option at startup
+    and the results are stored in _FIG_CACHE.
+
+    ARGS:
+        cids: a integer, the number of CAPEC IDs to display on the word cloud. Can be a value 20-50.
+
+    RETURNS:
+        fig: the word cloud with the correct number of CAPEC IDs
+    """
+
+#cids is going to dictate how many CAPEC ids are shown
+#500 is the range of values to be randomly selected from, reducing the chances of overlapping points.
+
+    fig = go.Figure(data=go.Scattergl(x=_rng.choice(500, size=cids, replace=False),
+                 y=_rng.choice(500, size=cids, replace=False),
+                 mode='text',
+                 text=CAPECids,
+                  hovertext=df['Name'],
+                  hoverinfo='text',
+                 textfont={'size': _wt_palette[_wt_codes[:cids]],
+                           'color': _sev_palette[_sev_codes[:cids]]}),
+                layout=_LAYOUT)
+
+    return fig
+
+
+#one prebuilt figure per dropdown option so switching between them does not rebuild the figure
+_FIG_CACHE = {n: _build_fig(n) for n in (20, 30, 40, 50)}
 
 
 @app.callback(
     Output('word-cloud', 'figure'),
-    Input('dropdown', 'value')
+    Input('dropdown', 'value'),
+    prevent_initial_call=True
 )
 def update_figure(cids):
     """
@@ -142,28 +226,9 @@ def update_figure(cids):
         fig: the updated word cloud with the correct number of CAPEC IDs
     """
 
-    layout = go.Layout( {'xaxis': {'showgrid': False, 'showticklabels': False, 'zeroline': False},
-                    'yaxis': {'showgrid': False, 'showticklabels': False, 'zeroline': False}},
-                    width =760,
-                    height =760
-)
-#cids is going to dictate how many CAPEC ids are shown
-#range(num) represents range of values to be randomly selected from, reducing the chances of overlapping points.
-
-    fig = go.Figure(data=go.Scatter(x=random.sample(range(500), cids),
-                 y= random.sample(range(500), cids) ,
-                 mode='text',
-                 text=CAPECids,
-                  hovertext=df['Name'],
-                  hoverinfo='text',
-                 textfont={'size': weight_size,
-                           'color': severity_color}),
-                layout=layout)
-
-    return fig
+    return _FIG_CACHE[cids]
 
 
-fig = update_figure(20)
 #app.layout describes what the app looks like and is a hierarchical tree of components
 app.layout = html.Div(children=[
     html.H1('CAPEC Word Cloud'),
@@ -190,7 +255,7 @@ app.layout = html.Div(children=[
  html.Div([
         dcc.Graph(
             id='word-cloud',
-            figure=fig,
+            figure=_FIG_CACHE[20],
             clickData= None,
             style = {'width': '50%', 'display': 'inline-block'}
         ),
@@ -213,7 +278,7 @@ app.layout = html.Div(children=[
                 html.P('Medium', style={'color':'black','fontSize': weights['Medium'], 'margin': '0px 15px'}),
                 html.P('Low', style={'color':'black','fontSize': weights['Low'], 'margin': '0px 15px'}),
             ], style={'display': 'flex', 'fontSize': 16}),
-            html.Div(id='point-info')
+            html.Div(id='point-info', children=_EMPTY_INFO)
     ], style={'fontSize': 18,'width': '50%', 'marginLeft': 40, 'marginTop': 80}
         )], style={'display': 'flex'}),
     html.Br(),
@@ -227,7 +292,7 @@ app.layout = html.Div(children=[
         {'label': 'Mitigation', 'value': 'mitigation'},
         ],
             value='mitigation'),
-        html.Div(id='table')
+        html.Div(id='table', children=_EMPTY_TABLE)
     ])
     ])
 if __name__== '__main__':